@@ -4,6 +4,9 @@ from ultralytics import YOLO
 import json
 from datetime import datetime
 import os
+import time
+
+from qos import QOS_BASE_IMGSZ, QOS_ENABLED, QoSController
 
 # easyocr özel hata düzeltmesi: GUI kütüphaneleri yüklü olmadığında çalışmasını sağla
 os.environ['MPLBACKEND'] = 'Agg'
@@ -83,11 +86,37 @@ def save_to_json(plate_text):
     with open(JSON_FILE, 'w') as f:
         json.dump(data, f, indent=4, ensure_ascii=False)
 
-def process_frame(frame, model):
+def draw_detections(frame, detections):
+    """
+    Tespit edilen kutuları kareye çizer. Geçerli plakalar pembe kare ve
+    metinle, geçersizler kırmızı kare ile gösterilir.
+    """
+    for x1, y1, x2, y2, plate_text in detections:
+        try:
+            if plate_text:
+                # Tespit edilen plakayı pembe bir kare içine al
+                cv2.rectangle(frame, (x1, y1), (x2, y2), (255, 0, 255), 2)  # (255, 0, 255) R, G, B değeriyle pembe
+                cv2.putText(frame, plate_text, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (255, 0, 255), 2)
+            else:
+                # Geçersiz plaka ise farklı bir renkte çiz
+                cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 0, 255), 2)
+        except Exception as e:
+            print(f"Resim çizim hatası: {e}")
+
+def process_frame(frame, model, qos=None, detections=None):
     """
     Tek bir kareyi işler: Plakayı tespit eder, okur, gösterir ve kaydeder.
+    qos verilirse aşama süreleri ölçülür ve kalite ayarları uygulanır.
+    detections listesi verilirse çizilen kutular içine yazılır.
     """
-    results = model(frame)
+    start = time.perf_counter()
+    if qos is not None and qos.level > 0:
+        results = model(frame, imgsz=qos.imgsz)
+    else:
+        results = model(frame)
+    detect_ms = (time.perf_counter() - start) * 1000
+    ocr_ms = 0.0
+    found = []
 
     for r in results:
         boxes = r.boxes
@@ -97,7 +126,11 @@ def process_frame(frame, model):
             plate_roi = frame[y1:y2, x1:x2]
             
             plate_text = ""
-            if reader is not None:
+            run_ocr = reader is not None
+            if run_ocr and qos is not None:
+                run_ocr = qos.should_ocr(float(box.conf[0]), (x2 - x1) * (y2 - y1))
+            if run_ocr:
+                ocr_start = time.perf_counter()
                 try:
                     ocr_result = reader.readtext(plate_roi)
                     if ocr_result:
@@ -124,24 +157,22 @@ def process_frame(frame, model):
                 except Exception as e:
                     print(f"OCR hatası: {e}")
                     plate_text = ""
+                ocr_ms += (time.perf_counter() - ocr_start) * 1000
 
             if plate_text and is_valid_plate(plate_text):
                 print(f"Tespit Edilen Plaka: {plate_text}")
                 save_to_json(plate_text)
-                
-                # Tespit edilen plakayı pembe bir kare içine al
-                try:
-                    cv2.rectangle(frame, (x1, y1), (x2, y2), (255, 0, 255), 2)  # (255, 0, 255) R, G, B değeriyle pembe
-                    cv2.putText(frame, plate_text, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (255, 0, 255), 2)
-                except Exception as e:
-                    print(f"Resim çizim hatası: {e}")
             else:
-                # Geçersiz plaka ise farklı bir renkte çiz
-                try:
-                    cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 0, 255), 2)
-                except Exception as e:
-                    print(f"Resim çizim hatası: {e}")
-                    
+                plate_text = ""
+            found.append((x1, y1, x2, y2, plate_text))
+
+    draw_detections(frame, found)
+    if detections is not None:
+        detections[:] = found
+
+    if qos is not None:
+        qos.record(detect_ms, ocr_ms, (time.perf_counter() - start) * 1000)
+
     return frame
 
 # ----------------------------------------------------
@@ -168,6 +199,7 @@ if SOURCE_TYPE == "image":
         
 elif SOURCE_TYPE == "webcam":
     # Kamera akışını başlat
+    qos = None
     try:
         cap = cv2.VideoCapture(WEBCAM_ID)
         if not cap.isOpened():
@@ -182,14 +214,30 @@ elif SOURCE_TYPE == "webcam":
         
         if cap and cap.isOpened():
             frame_count = 0
+            frame_index = 0
+            last_detections = []
+            if QOS_ENABLED:
+                # Seviye 0 modelin kendi çözünürlüğüdür, hedef FPS kaynağın hızını aşamaz
+                qos = QoSController(base_imgsz=model.overrides.get("imgsz", QOS_BASE_IMGSZ),
+                                    source_fps=cap.get(cv2.CAP_PROP_FPS))
             while True:
+                read_start = time.perf_counter()
                 ret, frame = cap.read()
+                read_ms = (time.perf_counter() - read_start) * 1000
                 if not ret:
                     print(f"Video sonlandı. {frame_count} kare işlendi.")
                     break
                 
-                processed_frame = process_frame(frame, model)
-                frame_count += 1
+                frame_index += 1
+                # should_skip her okunan karede çağrılır; kare bekleme süresi
+                # hariç döngünün gerçek kare süresini ölçer
+                if qos is not None and qos.should_skip(frame_index - 1, wait_ms=read_ms):
+                    # Yük altında kare atlanır, titreme olmaması için son tespitler çizilir
+                    draw_detections(frame, last_detections)
+                    processed_frame = frame
+                else:
+                    processed_frame = process_frame(frame, model, qos, last_detections)
+                    frame_count += 1
                 
                 # Canlı akışı göster (GUI varsa)
                 try:
@@ -208,6 +256,9 @@ elif SOURCE_TYPE == "webcam":
             cap.release()
     except Exception as e:
         print(f"Webcam/Video hatası: {e}")
+    finally:
+        if qos is not None:
+            print(f"[QoS] Özet: {qos.snapshot()}")
 
 try:
     cv2.destroyAllWindows()
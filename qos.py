@@ -0,0 +1,232 @@
+import time
+
+# ----------------------------------------------------
+# QoS PARAMETRELERİ
+# ----------------------------------------------------
+
+# Hizmet kalitesi (QoS) denetleyicisi: CPU doygunken kaliteyi düşürerek
+# hedef FPS ve gecikme bütçesini korur
+QOS_ENABLED = True
+QOS_TARGET_FPS = 10  # Kaynaktan saniyede tüketilmesi gereken kare sayısı (kaynak FPS'i ile sınırlanır)
+QOS_BASE_IMGSZ = 640  # Model kendi imgsz değerini taşımıyorsa seviye 0 çözünürlüğü
+QOS_LATENCY_BUDGET_MS = 150  # İşlenen tek bir kare için izin verilen süre
+QOS_COOLDOWN_FRAMES = 10  # İki ayar arasında beklenecek işlenmiş kare sayısı
+QOS_MAX_COOLDOWN_FRAMES = 160  # Geri alınan yükseltmelerden sonra bekleme süresinin üst sınırı
+QOS_RECOVER_RATIO = 0.8  # Üst seviyede tahmini yük bu oranın altındaysa kalite yükseltilir
+QOS_METRICS_INTERVAL = 100  # Metriklerin kaç işlenmiş karede bir loglanacağı
+
+# Kalite seviyeleri: 0 en yüksek kalite, her adım daha fazla iş atar
+# imgsz_scale: modelin kendi tespit çözünürlüğüne göre oran, min_det_conf /
+# min_box_area: bu eşiklerin altındaki kutularda OCR atlanır, frame_skip: her
+# işlenen kareden sonra atlanan kare
+QOS_LEVELS = [
+    {"imgsz_scale": 1.0, "min_det_conf": 0.0, "min_box_area": 0, "frame_skip": 0},
+    {"imgsz_scale": 0.8, "min_det_conf": 0.4, "min_box_area": 1500, "frame_skip": 0},
+    {"imgsz_scale": 0.65, "min_det_conf": 0.5, "min_box_area": 2500, "frame_skip": 1},
+    {"imgsz_scale": 0.5, "min_det_conf": 0.6, "min_box_area": 4000, "frame_skip": 2},
+    {"imgsz_scale": 0.5, "min_det_conf": 0.7, "min_box_area": 6000, "frame_skip": 4},
+]
+
+# YOLO girişi bu adımın katı olmalıdır
+IMGSZ_STRIDE = 32
+
+# ----------------------------------------------------
+# DENETLEYİCİ
+# ----------------------------------------------------
+
+class QoSController:
+    """
+    Aşama gecikmelerini (tespit, OCR, toplam) ve kare başına harcanan CPU
+    süresini izler; hedef FPS ile gecikme bütçesi aşıldığında QOS_LEVELS
+    içinde daha düşük kaliteye geçer. Kameranın kare beklerken geçen süresi
+    yük sayılmaz. Üst seviyenin tahmini yükü bütçeye sığıyorsa kaliteyi adım
+    adım geri yükseltir.
+
+    base_imgsz modelin kendi tespit çözünürlüğüdür; alt seviyeler buna göre
+    ölçeklenir. source_fps verilirse hedef FPS kaynağın hızıyla sınırlanır.
+    """
+
+    def __init__(self, target_fps=QOS_TARGET_FPS, latency_budget_ms=QOS_LATENCY_BUDGET_MS,
+                 levels=QOS_LEVELS, cooldown_frames=QOS_COOLDOWN_FRAMES,
+                 max_cooldown_frames=QOS_MAX_COOLDOWN_FRAMES,
+                 recover_ratio=QOS_RECOVER_RATIO, metrics_interval=QOS_METRICS_INTERVAL,
+                 base_imgsz=QOS_BASE_IMGSZ, source_fps=None, alpha=0.3):
+        if source_fps and source_fps > 0:
+            target_fps = min(target_fps, source_fps)
+        if isinstance(base_imgsz, (list, tuple)):
+            base_imgsz = max(base_imgsz)
+        self.frame_interval_ms = 1000.0 / target_fps
+        self.base_imgsz = base_imgsz
+        self.latency_budget_ms = latency_budget_ms
+        self.levels = levels
+        self.cooldown_frames = cooldown_frames
+        self.max_cooldown_frames = max_cooldown_frames
+        self.upgrade_cooldown_frames = cooldown_frames
+        self.recover_ratio = recover_ratio
+        self.metrics_interval = metrics_interval
+        self.alpha = alpha  # Üstel hareketli ortalama katsayısı
+        self.level = 0
+        self.frames_since_change = 0
+        self.last_action = None
+        self.stage_ms = {"detect": None, "ocr": None, "total": None}
+        self.source_ms = None  # Kaynak kare başına ölçülen, kare bekleme hariç süre
+        self._cycle_start = None
+        self._cycle_frames = 0
+        self._cycle_wait_ms = 0.0
+        self.metrics = {
+            "processed_frames": 0,
+            "skipped_frames": 0,
+            "skipped_ocr_boxes": 0,
+            "degrade_count": 0,
+            "upgrade_count": 0,
+            "budget_violations": 0,
+        }
+
+    @property
+    def settings(self):
+        """Geçerli kalite seviyesinin ayarları"""
+        return self.levels[self.level]
+
+    @property
+    def imgsz(self):
+        """Geçerli seviyenin tespit çözünürlüğü"""
+        return self.imgsz_for(self.level)
+
+    def imgsz_for(self, level):
+        """Seviyenin tespit çözünürlüğünü base_imgsz'e göre hesaplar."""
+        scale = self.levels[level]["imgsz_scale"]
+        if scale == 1.0:
+            return self.base_imgsz
+        return max(IMGSZ_STRIDE, int(round(self.base_imgsz * scale / IMGSZ_STRIDE)) * IMGSZ_STRIDE)
+
+    def should_skip(self, frame_index, now_ms=None, wait_ms=0.0):
+        """
+        Kaynaktan okunan her kare için, kare okunduktan sonra çağrılır. Kare
+        atlama oranına göre bu karenin işlenip işlenmeyeceğine karar verir ve
+        işlenen iki kare arasındaki süreyi (gösterme ve atlanan kareler dahil)
+        ölçer. wait_ms bu karenin okunmasında beklenen süredir; kamera yavaş
+        olduğu için geçen bu süre CPU yükü sayılmaz.
+        """
+        if now_ms is None:
+            now_ms = time.perf_counter() * 1000
+        self._cycle_wait_ms += wait_ms
+
+        skip = frame_index % (self.settings["frame_skip"] + 1) != 0
+        if skip:
+            self.metrics["skipped_frames"] += 1
+            self._cycle_frames += 1
+            return True
+
+        if self._cycle_start is not None and self._cycle_frames:
+            busy_ms = max(0.0, now_ms - self._cycle_start - self._cycle_wait_ms)
+            self.source_ms = self._smooth(self.source_ms, busy_ms / self._cycle_frames)
+        self._cycle_start = now_ms
+        self._cycle_frames = 1
+        self._cycle_wait_ms = 0.0
+        return False
+
+    def should_ocr(self, confidence, area):
+        """Düşük skorlu veya küçük kutularda OCR'ı atlar."""
+        settings = self.settings
+        if confidence < settings["min_det_conf"] or area < settings["min_box_area"]:
+            self.metrics["skipped_ocr_boxes"] += 1
+            return False
+        return True
+
+    def record(self, detect_ms, ocr_ms, total_ms):
+        """Bir karenin aşama sürelerini kaydeder ve gerekirse kaliteyi ayarlar."""
+        for stage, value in (("detect", detect_ms), ("ocr", ocr_ms), ("total", total_ms)):
+            self.stage_ms[stage] = self._smooth(self.stage_ms[stage], value)
+
+        self.metrics["processed_frames"] += 1
+        if total_ms > self.latency_budget_ms:
+            self.metrics["budget_violations"] += 1
+        self.frames_since_change += 1
+        self._adjust()
+
+        if self.metrics_interval and self.metrics["processed_frames"] % self.metrics_interval == 0:
+            print(f"[QoS] Metrikler: {self.snapshot()}")
+
+    def load(self):
+        """
+        Bütçeye göre yük oranı: 1'in üstü bütçe aşımı demektir.
+        Hem tek kare gecikmesi hem de kaynak kare başına ölçülen, kare
+        bekleme hariç süre (hedef FPS) dikkate alınır. Süre henüz
+        ölçülmediyse işleme süresinin atlanan karelere paylaştırılmış hali
+        kullanılır.
+        """
+        total = self.stage_ms["total"] or 0.0
+        if self.source_ms is not None:
+            per_source_frame = self.source_ms
+        else:
+            per_source_frame = total / (self.settings["frame_skip"] + 1)
+        return self._ratio(total, per_source_frame)
+
+    def expected_load(self, level):
+        """
+        Verilen seviyeye geçilirse beklenen yük oranı. Tespit süresi
+        imgsz karesiyle ölçeklenir; OCR süresi ve döngünün işleme dışı
+        maliyeti (gösterme vb.) aynı kabul edilir.
+        """
+        detect = self.stage_ms["detect"] or 0.0
+        ocr = self.stage_ms["ocr"] or 0.0
+        total = self.stage_ms["total"] or 0.0
+        current_skip = self.settings["frame_skip"] + 1
+
+        overhead = 0.0
+        if self.source_ms is not None:
+            overhead = max(0.0, self.source_ms - total / current_skip)
+
+        target = self.levels[level]
+        scale = (self.imgsz_for(level) / self.imgsz) ** 2
+        expected_total = detect * scale + ocr + max(0.0, total - detect - ocr)
+        return self._ratio(expected_total, expected_total / (target["frame_skip"] + 1) + overhead)
+
+    def _ratio(self, total, per_source_frame):
+        return max(total / self.latency_budget_ms, per_source_frame / self.frame_interval_ms)
+
+    def _smooth(self, previous, value):
+        return value if previous is None else self.alpha * value + (1 - self.alpha) * previous
+
+    def _adjust(self):
+        # Tutunan bir yükseltmeden sonra bekleme süresini normale döndür
+        if (self.last_action == "upgrade" and self.frames_since_change >= 3 * self.cooldown_frames
+                and self.upgrade_cooldown_frames != self.cooldown_frames):
+            self.upgrade_cooldown_frames = self.cooldown_frames
+
+        if self.frames_since_change < self.cooldown_frames:
+            return
+
+        load = self.load()
+        if load > 1.0 and self.level < len(self.levels) - 1:
+            # Yeni yapılmış bir yükseltme geri alınıyorsa bir sonraki
+            # yükseltmeden önce daha uzun bekle
+            if self.last_action == "upgrade" and self.frames_since_change < 3 * self.cooldown_frames:
+                self.upgrade_cooldown_frames = min(self.upgrade_cooldown_frames * 2,
+                                                   self.max_cooldown_frames)
+            self._set_level(self.level + 1, "degrade", load)
+        elif (self.level > 0 and self.frames_since_change >= self.upgrade_cooldown_frames
+              and self.expected_load(self.level - 1) < self.recover_ratio):
+            self._set_level(self.level - 1, "upgrade", load)
+
+    def _set_level(self, level, action, load):
+        self.level = level
+        self.frames_since_change = 0
+        self.last_action = action
+        self.metrics[f"{action}_count"] += 1
+        label = "düşürüldü" if action == "degrade" else "yükseltildi"
+        source = f"{self.source_ms:.1f}ms" if self.source_ms is not None else "-"
+        print(f"[QoS] Kalite {label}: seviye {level} imgsz={self.imgsz} {self.settings} "
+              f"(yük={load:.2f}, tespit={self.stage_ms['detect']:.1f}ms, "
+              f"ocr={self.stage_ms['ocr']:.1f}ms, toplam={self.stage_ms['total']:.1f}ms, "
+              f"kare_arası={source})")
+
+    def snapshot(self):
+        """Loglama/izleme için anlık metrikleri döndürür."""
+        data = dict(self.metrics)
+        data["level"] = self.level
+        data["imgsz"] = self.imgsz
+        data["upgrade_cooldown_frames"] = self.upgrade_cooldown_frames
+        data["source_ms"] = self.source_ms
+        data.update({f"{stage}_ms": value for stage, value in self.stage_ms.items()})
+        return data
@@ -0,0 +1,144 @@
+from qos import QoSController
+
+
+def replay(qos, frames, detect_at_640, ocr_ms, read_ms=0.0, overhead_ms=0.0,
+           start_ms=0.0, start_index=0):
+    """
+    Sentetik kare maliyetleriyle ana döngüyü tekrar oynatır. Tespit süresi
+    imgsz karesiyle ölçeklenir; read_ms kameranın kareyi beklettiği süreyi,
+    overhead_ms gösterme gibi işleme dışı CPU süresini temsil eder. Her
+    işlenen karedeki seviye döndürülür.
+    """
+    now = start_ms
+    levels = []
+    for i in range(start_index, start_index + frames):
+        now += read_ms + overhead_ms
+        if qos.should_skip(i, now, wait_ms=read_ms):
+            continue
+        detect = detect_at_640 * (qos.imgsz / 640) ** 2
+        total = detect + ocr_ms
+        qos.record(detect, ocr_ms, total)
+        now += total
+        levels.append(qos.level)
+    return levels, now
+
+
+def level_changes(levels):
+    return sum(1 for a, b in zip(levels, levels[1:]) if a != b)
+
+
+def test_settles_within_budget_under_overload():
+    qos = QoSController(metrics_interval=0)
+    levels, _ = replay(qos, 600, detect_at_640=300, ocr_ms=60, read_ms=5)
+
+    assert qos.level > 0
+    assert level_changes(levels[-100:]) == 0
+    assert qos.stage_ms["total"] <= qos.latency_budget_ms
+    assert qos.source_ms <= qos.frame_interval_ms
+    assert qos.load() <= 1.0
+
+
+def test_recovers_to_full_quality_when_load_drops():
+    qos = QoSController(metrics_interval=0)
+    _, now = replay(qos, 600, detect_at_640=300, ocr_ms=60, read_ms=5)
+    assert qos.level > 0
+
+    replay(qos, 600, detect_at_640=40, ocr_ms=10, read_ms=5, start_ms=now, start_index=600)
+
+    assert qos.level == 0
+    assert qos.metrics["upgrade_count"] == qos.metrics["degrade_count"]
+
+
+def test_does_not_oscillate_between_neighbouring_levels():
+    # Seviye 1'de yük ~1.07, seviye 2'de ~0.54: eski denetleyici bu iki
+    # seviye arasında her bekleme süresinde gidip geliyordu
+    qos = QoSController(metrics_interval=0)
+    levels, _ = replay(qos, 400, detect_at_640=120, ocr_ms=30)
+
+    assert qos.metrics["degrade_count"] == 2
+    assert qos.metrics["upgrade_count"] == 0
+    assert level_changes(levels[-150:]) == 0
+
+
+def test_uses_measured_loop_time_for_fps_target():
+    # İşleme süresi tek başına hem bütçeye hem hedef FPS'e sığıyor, ancak
+    # gösterme süresiyle döngü 10 FPS'in altında kalıyor
+    qos = QoSController(metrics_interval=0)
+    replay(qos, 600, detect_at_640=40, ocr_ms=20, overhead_ms=70)
+
+    assert qos.level > 0
+    assert qos.settings["frame_skip"] > 0
+    assert qos.source_ms <= qos.frame_interval_ms
+
+
+def test_slow_source_with_cheap_processing_stays_at_full_quality():
+    # 8 FPS kamera: döngü yavaş ama CPU boşta, kalite düşürülmemeli
+    qos = QoSController(metrics_interval=0)
+    levels, _ = replay(qos, 600, detect_at_640=15, ocr_ms=10, read_ms=125)
+
+    assert set(levels) == {0}
+    assert qos.metrics["degrade_count"] == 0
+    assert qos.metrics["skipped_frames"] == 0
+
+
+def test_target_fps_is_capped_at_source_fps():
+    qos = QoSController(target_fps=10, source_fps=8, metrics_interval=0)
+    assert qos.frame_interval_ms == 125.0
+
+    # Kamera FPS bildirmiyorsa (0) hedef değişmez
+    qos = QoSController(target_fps=10, source_fps=0, metrics_interval=0)
+    assert qos.frame_interval_ms == 100.0
+
+
+def test_level_zero_uses_model_imgsz():
+    qos = QoSController(base_imgsz=960, metrics_interval=0)
+    assert qos.imgsz == 960
+    assert [qos.imgsz_for(level) for level in range(1, len(qos.levels))] == [768, 640, 480, 480]
+    assert all(qos.imgsz_for(level) % 32 == 0 for level in range(len(qos.levels)))
+
+    # Modelde liste olarak saklanan imgsz
+    assert QoSController(base_imgsz=[480, 640], metrics_interval=0).imgsz == 640
+
+
+def test_upgrade_cooldown_backs_off_and_resets():
+    qos = QoSController(metrics_interval=0)
+    qos.level = 1
+    qos.last_action = "upgrade"
+
+    # Yükseltmenin hemen ardından aşım: bir sonraki yükseltme daha geç gelir
+    for _ in range(qos.cooldown_frames):
+        qos.record(100, 80, 180)
+    assert qos.level == 2
+    assert qos.upgrade_cooldown_frames == 2 * qos.cooldown_frames
+
+    # Yük düşünce yükseltme uzatılmış bekleme süresinden sonra gelir
+    levels, _ = replay(qos, 400, detect_at_640=40, ocr_ms=10)
+    assert qos.level == 0
+    assert qos.upgrade_cooldown_frames == qos.cooldown_frames
+    assert levels.index(1) >= 2 * qos.cooldown_frames - 1
+
+    # Sonraki bir aşımdan sonra toparlanma yine normal bekleme süresiyle olur
+    while qos.level == 0:
+        qos.record(100, 80, 180)
+    assert qos.upgrade_cooldown_frames == qos.cooldown_frames
+    levels, _ = replay(qos, 100, detect_at_640=40, ocr_ms=10, start_index=400)
+    assert levels.index(0) == qos.cooldown_frames - 1
+
+
+def test_skips_ocr_on_low_score_and_small_boxes():
+    qos = QoSController(metrics_interval=0)
+    qos.level = 2
+    min_conf = qos.settings["min_det_conf"]
+    min_area = qos.settings["min_box_area"]
+
+    assert qos.should_ocr(min_conf, min_area)
+    assert not qos.should_ocr(min_conf - 0.1, min_area)
+    assert not qos.should_ocr(min_conf, min_area - 1)
+    assert qos.metrics["skipped_ocr_boxes"] == 2
+
+
+def test_logs_metrics_periodically(capsys):
+    qos = QoSController(metrics_interval=5)
+    replay(qos, 10, detect_at_640=40, ocr_ms=10)
+
+    assert capsys.readouterr().out.count("[QoS] Metrikler:") == 2